@@ -14,14 +14,33 @@ Usage:
 
 import json
 import sys
+from bisect import bisect_right
 from pathlib import Path
-from collections import Counter
+from functools import lru_cache
 
 # Add lib to path
 LIB_DIR = Path(__file__).resolve().parent.parent / "lib"
 sys.path.insert(0, str(LIB_DIR))
 
-from knowledge import add_pending_learning
+from knowledge import add_pending_learnings
+
+# Error keywords per learning category, checked in priority order
+LEARNING_CATEGORIES = (
+    ('shell', ('parse error', 'syntax error', 'unexpected token', 'unterminated', 'bad substitution')),
+    ('permissions', ('permission denied', 'access denied', 'eacces')),
+    ('paths', ('not found', 'no such file', 'enoent')),
+    ('network', ('connection refused', 'timeout', 'econnrefused')),
+    ('python', ('traceback', 'import error', 'no module named', 'typeerror')),
+    ('git', ('fatal:', 'merge conflict', 'detached head')),
+    ('npm', ('npm err', 'npm warn')),
+    ('aws', ('expired', 'credentials', 'access denied', 'invalididentity')),
+)
+
+
+def command_head(command: str) -> str:
+    """Return the first whitespace-separated token of a command."""
+    parts = command.split(None, 1)
+    return parts[0] if parts else ''
 
 
 def extract_failure_resolution_pairs(session_data: dict) -> list:
@@ -33,34 +52,45 @@ def extract_failure_resolution_pairs(session_data: dict) -> list:
         return []
 
     proposals = []
-    failed_commands = {f.get('command', '')[:50] for f in failures}
+    failed_commands = frozenset(f.get('command', '')[:50] for f in failures)
+
+    # Bucket candidate resolutions (commands that never failed themselves) by
+    # first token; they arrive in index order, so each bucket's index list is
+    # already sorted for bisection
+    by_prefix = {}
+    for cmd in commands:
+        cmd_text = cmd.get('command', '')
+        if cmd_text[:50] in failed_commands:
+            continue
+        cmd_prefix = command_head(cmd_text)
+        indices, candidates = by_prefix.setdefault(cmd_prefix, ([], []))
+        indices.append(cmd.get('index', 0))
+        candidates.append(cmd_text)
 
     # Look for commands that are similar to failed ones but appeared later
     for failure in failures:
         failed_cmd = failure.get('command', '')
-        failed_prefix = failed_cmd.split()[0] if failed_cmd else ''
+        failed_prefix = command_head(failed_cmd)
         failed_index = failure.get('index', 0)
         error_msg = failure.get('error', '')
 
-        # Find a later command with the same prefix that isn't in failures
-        for cmd in commands:
-            cmd_text = cmd.get('command', '')
-            cmd_prefix = cmd_text.split()[0] if cmd_text else ''
-            cmd_index = cmd.get('index', 0)
-
-            if (cmd_prefix == failed_prefix and
-                cmd_index > failed_index and
-                cmd_text[:50] not in failed_commands):
-                # Found a resolution
-                proposals.append({
-                    'category': categorize_for_learning(error_msg),
-                    'title': f"Fix for {failed_prefix} failure",
-                    'description': f"Command `{failed_cmd[:80]}` failed with: {error_msg[:100]}",
-                    'solution': f"Use instead: `{cmd_text[:100]}`",
-                    'source': 'failure_resolution',
-                    'session_id': session_data.get('session_id', '')
-                })
-                break
+        bucket = by_prefix.get(failed_prefix)
+        if not bucket:
+            continue
+        indices, candidates = bucket
+
+        # First later command with the same prefix is the resolution
+        pos = bisect_right(indices, failed_index)
+        if pos < len(candidates):
+            cmd_text = candidates[pos]
+            proposals.append({
+                'category': categorize_for_learning(error_msg),
+                'title': f"Fix for {failed_prefix} failure",
+                'description': f"Command `{failed_cmd[:80]}` failed with: {error_msg[:100]}",
+                'solution': f"Use instead: `{cmd_text[:100]}`",
+                'source': 'failure_resolution',
+                'session_id': session_data.get('session_id', '')
+            })
 
     return proposals
 
@@ -71,21 +101,21 @@ def extract_repeated_failure_patterns(session_data: dict) -> list:
     if len(failures) < 2:
         return []
 
-    # Count error categories
-    categories = Counter()
-    category_examples = {}
+    # Count error categories, keeping the first failure of each as example
+    categories = {}
 
     for failure in failures:
         error = failure.get('error', '')
         cat = categorize_for_learning(error)
-        categories[cat] += 1
-        if cat not in category_examples:
-            category_examples[cat] = failure
+        entry = categories.get(cat)
+        if entry is None:
+            categories[cat] = [1, failure]
+        else:
+            entry[0] += 1
 
     proposals = []
-    for cat, count in categories.items():
+    for cat, (count, example) in categories.items():
         if count >= 3:  # Only if it happened 3+ times in one session
-            example = category_examples[cat]
             proposals.append({
                 'category': cat,
                 'title': f"Recurring {cat} errors ({count}x in session)",
@@ -98,22 +128,12 @@ def extract_repeated_failure_patterns(session_data: dict) -> list:
     return proposals
 
 
+@lru_cache(maxsize=512)
 def categorize_for_learning(error_msg: str) -> str:
     """Map error message to a learning category."""
     error_lower = error_msg.lower()
 
-    mappings = [
-        ('shell', ['parse error', 'syntax error', 'unexpected token', 'unterminated', 'bad substitution']),
-        ('permissions', ['permission denied', 'access denied', 'eacces']),
-        ('paths', ['not found', 'no such file', 'enoent']),
-        ('network', ['connection refused', 'timeout', 'econnrefused']),
-        ('python', ['traceback', 'import error', 'no module named', 'typeerror']),
-        ('git', ['fatal:', 'merge conflict', 'detached head']),
-        ('npm', ['npm err', 'npm warn']),
-        ('aws', ['expired', 'credentials', 'access denied', 'invalididentity']),
-    ]
-
-    for category, keywords in mappings:
+    for category, keywords in LEARNING_CATEGORIES:
         if any(kw in error_lower for kw in keywords):
             return category
 
@@ -143,10 +163,7 @@ def main():
     proposals.extend(extract_repeated_failure_patterns(session_data))
 
     # Add unique proposals to pending
-    added = 0
-    for proposal in proposals:
-        if add_pending_learning(proposal, project_folder):
-            added += 1
+    added = add_pending_learnings(proposals, project_folder)
 
     print(json.dumps({'proposals_added': added}))
 
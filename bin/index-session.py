@@ -15,13 +15,25 @@ import json
 from pathlib import Path
 from datetime import datetime, timedelta
 import re
+import heapq
+from functools import lru_cache
+from itertools import islice
+
+# Add lib to path
+LIB_DIR = Path(__file__).resolve().parent.parent / "lib"
+sys.path.insert(0, str(LIB_DIR))
+
+from storage import json_loads, json_dumps, atomic_write, scan_jsonl_files
 
 # Index size limits
 MAX_SESSIONS_IN_INDEX = 50  # Keep summaries for last 50 sessions
 MAX_INDEX_SIZE_KB = 60      # Target max size for main index
+CLEANUP_INTERVAL = 10       # Clean up old files every 10th indexed session
+MAX_TOPICS = 20             # Topics kept per session, in first-seen order
+TOPIC_SCAN_CHARS = 500      # Only look for topics near the start of a message
 
 # Topic stop words (common English words that start with capital letters)
-TOPIC_STOP_WORDS = {
+TOPIC_STOP_WORDS = frozenset({
     'The', 'This', 'That', 'These', 'Those', 'There', 'Then', 'They',
     'What', 'When', 'Where', 'Which', 'While', 'Who', 'Why', 'How',
     'And', 'But', 'For', 'Not', 'With', 'From', 'Into', 'Over',
@@ -35,10 +47,33 @@ TOPIC_STOP_WORDS = {
     'Need', 'Want', 'Like', 'Look', 'Take', 'Give', 'Keep', 'Put',
     'Does', 'Did', 'Has', 'Have', 'Had', 'Was', 'Were', 'Are',
     'Fix', 'Help', 'Start', 'Stop', 'Open', 'Close', 'Read', 'Write',
-}
+})
+
+# Topic candidates: CamelCase words and snake_case identifiers
+TOPIC_WORD_RE = re.compile(r'\b[A-Z][a-z]+(?:[A-Z][a-z]+)*\b|\b[a-z]+(?:_[a-z]+)+\b')
+
+# File paths with common source/config extensions
+TOPIC_PATH_RE = re.compile(r'[\w./~-]+\.(?:py|js|ts|json|sh|md|env|yml|yaml)\b')
+
+# Substrings in tool output that mark a failed command
+# ('command not found' is covered by 'not found')
+ERROR_INDICATORS = ('error:', 'failed', 'exception', 'traceback', 'permission denied', 'not found')
+
+# Failure pattern keywords, checked in priority order
+ERROR_CATEGORIES = (
+    ('permission_denied', ('permission denied', 'access denied', 'eacces')),
+    ('not_found', ('not found', 'no such file', 'enoent', 'command not found')),
+    ('syntax_error', ('syntax error', 'parse error', 'unexpected token')),
+    ('connection_error', ('connection refused', 'timeout', 'econnrefused', 'network')),
+    ('import_error', ('import error', 'module not found', 'no module named')),
+    ('type_error', ('typeerror', 'type error')),
+    ('git_error', ('fatal:', 'git')),
+    ('npm_error', ('npm err', 'npm warn')),
+    ('python_error', ('traceback', 'exception')),
+)
 
 # Trivial messages to skip in summary generation
-TRIVIAL_MESSAGES = {'yes', 'no', 'ok', 'okay', 'sure', 'thanks', 'y', 'n', 'continue', 'go ahead', 'do it'}
+TRIVIAL_MESSAGES = frozenset({'yes', 'no', 'ok', 'okay', 'sure', 'thanks', 'y', 'n', 'continue', 'go ahead', 'do it'})
 
 
 def get_project_folder(cwd: str) -> str:
@@ -46,148 +81,190 @@ def get_project_folder(cwd: str) -> str:
     return cwd.replace('/', '-')
 
 
+@lru_cache(maxsize=None)
+def get_project_dir(project_folder: str) -> Path:
+    """Get Claude's data directory for a project folder."""
+    return Path.home() / '.claude' / 'projects' / project_folder
+
+
+@lru_cache(maxsize=None)
 def get_session_details_dir(project_folder: str) -> Path:
     """Get the directory for storing session detail files."""
-    return Path.home() / '.claude' / 'projects' / project_folder / 'recall-sessions'
+    return get_project_dir(project_folder) / 'recall-sessions'
 
-def find_current_session(project_folder: str) -> Path:
+def find_current_session(project_folder: str, jsonl_files: list = None) -> Path:
     """Find the most recent session file."""
-    claude_dir = Path.home() / '.claude' / 'projects' / project_folder
-    if not claude_dir.exists():
-        return None
-
-    sessions = []
-    for f in claude_dir.glob('*.jsonl'):
-        if not f.name.startswith('agent-'):
-            sessions.append(f)
+    if jsonl_files is None:
+        jsonl_files = scan_jsonl_files(get_project_dir(project_folder))
 
+    sessions = [f for f in jsonl_files if not f[3]]
     if not sessions:
         return None
 
-    sessions.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-    return sessions[0]
+    return max(sessions, key=lambda f: f[1])[0]
+
+def parse_session_full(session_file: Path, st: os.stat_result = None) -> dict:
+    """Parse session file and extract comprehensive data.
 
-def parse_session_full(session_file: Path) -> dict:
-    """Parse session file and extract comprehensive data."""
+    `st` is the file's stat result if the caller already has it.
+    """
+    if st is None:
+        st = session_file.stat()
     result = {
         'session_id': session_file.stem,
-        'date': datetime.fromtimestamp(session_file.stat().st_mtime).isoformat(),
+        'date': datetime.fromtimestamp(st.st_mtime).isoformat(),
+        'file_size': st.st_size,
         'user_messages': [],
         'commands': [],
         'failures': [],
         'failure_patterns': {},
-        'topics': set(),
+        'topics': {},  # Ordered set (dict keys), first MAX_TOPICS seen
         'summary': '',
         'skills_used': []  # Track skill invocations
     }
 
-    try:
-        with open(session_file, 'r') as f:
-            lines = f.readlines()
-
-        for i, line in enumerate(lines):
-            try:
-                obj = json.loads(line)
+    # Bind hot containers/methods once for the per-line loop
+    add_message = result['user_messages'].append
+    add_command = result['commands'].append
+    add_failure = result['failures'].append
+    add_skill = result['skills_used'].append
+    failure_patterns = result['failure_patterns']
+    topics = result['topics']
+    commands_by_id = {}  # tool_use id -> first command with that id
 
-                # Extract user messages
-                if obj.get('type') == 'user':
-                    msg = obj.get('message', {})
-                    if isinstance(msg, dict):
-                        content = msg.get('content', '')
-                        if isinstance(content, str) and content and not content.startswith('<'):
-                            result['user_messages'].append({
-                                'index': i,
-                                'content': content[:200],  # Reduced from 500
-                                'timestamp': obj.get('timestamp', '')
-                            })
-                            # Extract potential topics (capitalized words, technical terms, file paths)
-                            words = re.findall(r'\b[A-Z][a-z]+(?:[A-Z][a-z]+)*\b|\b[a-z]+(?:_[a-z]+)+\b', content)
-                            filtered = [w for w in words if w not in TOPIC_STOP_WORDS]
-                            result['topics'].update(filtered[:10])
-                            # Also extract file paths and technical identifiers
-                            paths = re.findall(r'[\w./~-]+\.(?:py|js|ts|json|sh|md|env|yml|yaml)\b', content)
-                            result['topics'].update(p.split('/')[-1] for p in paths[:5])
-
-                # Extract tool calls (bash commands and skill invocations)
-                if obj.get('type') == 'assistant':
+    try:
+        with open(session_file, 'rb', buffering=1 << 20) as f:
+            for i, line in enumerate(f):
+                # Only user/assistant records are used; skip decoding the rest.
+                # Matching the quoted value is robust to '"type": "user"'
+                # spacing and does not fire on keys like "userType".
+                if b'"user"' not in line and b'"assistant"' not in line:
+                    continue
+                try:
+                    obj = json_loads(line)
+
+                    typ = obj.get('type')
+                    if typ != 'user' and typ != 'assistant':
+                        continue
                     msg = obj.get('message', {})
-                    if isinstance(msg, dict):
-                        content = msg.get('content', [])
-                        if isinstance(content, list):
-                            for block in content:
-                                if isinstance(block, dict) and block.get('type') == 'tool_use':
-                                    tool_name = block.get('name', '')
-
-                                    # Track Bash commands
-                                    if tool_name == 'Bash':
-                                        cmd_input = block.get('input', {})
-                                        command = cmd_input.get('command', '')
-                                        if command:
-                                            result['commands'].append({
-                                                'index': i,
-                                                'tool_id': block.get('id', ''),
-                                                'command': command[:150]  # Reduced from 300
-                                            })
-
-                                    # Track Skill invocations
-                                    elif tool_name == 'Skill':
-                                        skill_input = block.get('input', {})
-                                        skill_name = skill_input.get('skill', '')
-                                        if skill_name:
-                                            result['skills_used'].append({
-                                                'skill': skill_name,
-                                                'timestamp': obj.get('timestamp', '')
-                                            })
+                    if not isinstance(msg, dict):
+                        continue
+                    content = msg.get('content')
+
+                    if typ == 'user':
+                        # Extract user messages
+                        if isinstance(content, str):
+                            if content and not content.startswith('<'):
+                                add_message({
+                                    'index': i,
+                                    'content': content[:200],  # Reduced from 500
+                                    'timestamp': obj.get('timestamp', '')
+                                })
+                                # Extract potential topics (capitalized words, technical terms, file paths)
+                                # until the cap is hit; no regex work at all after that
+                                if len(topics) < MAX_TOPICS:
+                                    # finditer + islice stop scanning once enough are found
+                                    scan = content
+                                    if len(scan) > TOPIC_SCAN_CHARS:
+                                        scan = scan[:TOPIC_SCAN_CHARS]
+                                        # Drop the trailing token only if the cut split it
+                                        if not scan[-1].isspace() and not content[TOPIC_SCAN_CHARS].isspace():
+                                            parts = scan.rsplit(None, 1)
+                                            scan = parts[0] if len(parts) == 2 else ''
+                                    words = (m.group() for m in TOPIC_WORD_RE.finditer(scan))
+                                    for w in islice((w for w in words if w not in TOPIC_STOP_WORDS), 10):
+                                        if len(topics) >= MAX_TOPICS:
+                                            break
+                                        topics[w] = None
+                                    # Also extract file paths and technical identifiers
+                                    if len(topics) < MAX_TOPICS:
+                                        for m in islice(TOPIC_PATH_RE.finditer(scan), 5):
+                                            if len(topics) >= MAX_TOPICS:
+                                                break
+                                            topics[m.group().rsplit('/', 1)[-1]] = None
 
-                # Extract tool results (to find failures)
-                if obj.get('type') == 'user':
-                    msg = obj.get('message', {})
-                    if isinstance(msg, dict):
-                        content = msg.get('content', [])
-                        if isinstance(content, list):
+                        # Extract tool results (to find failures)
+                        elif isinstance(content, list):
                             for block in content:
-                                if isinstance(block, dict) and block.get('type') == 'tool_result':
-                                    tool_content = block.get('content', '')
-                                    is_error = block.get('is_error', False)
-
-                                    # Check for error indicators
-                                    if is_error or (isinstance(tool_content, str) and any(err in tool_content.lower() for err in ['error:', 'failed', 'exception', 'traceback', 'permission denied', 'not found', 'command not found'])):
-                                        tool_id = block.get('tool_use_id', '')
-                                        # Find the command that caused this
-                                        for cmd in result['commands']:
-                                            if cmd.get('tool_id') == tool_id:
-                                                error_msg = tool_content[:200] if isinstance(tool_content, str) else str(tool_content)[:200]  # Reduced from 500
-                                                result['failures'].append({
-                                                    'command': cmd['command'],
-                                                    'error': error_msg,
-                                                    'index': i
-                                                })
-
-                                                # Categorize failure pattern
-                                                pattern = categorize_error(error_msg)
-                                                if pattern:
-                                                    if pattern not in result['failure_patterns']:
-                                                        result['failure_patterns'][pattern] = []
-                                                    result['failure_patterns'][pattern].append({
-                                                        'command': cmd['command'][:100],
-                                                        'error': error_msg[:200]
-                                                    })
-                                                break
+                                if not isinstance(block, dict):
+                                    continue
+                                get = block.get
+                                if get('type') != 'tool_result':
+                                    continue
+                                tool_content = get('content', '')
+                                is_str = isinstance(tool_content, str)
+
+                                # Check for error indicators
+                                if get('is_error', False) or (is_str and looks_like_error(tool_content)):
+                                    # Find the command that caused this
+                                    cmd = commands_by_id.get(get('tool_use_id', ''))
+                                    if cmd is not None:
+                                        error_msg = (tool_content if is_str else str(tool_content))[:200]  # Reduced from 500
+                                        add_failure({
+                                            'command': cmd['command'],
+                                            'error': error_msg,
+                                            'index': i
+                                        })
+
+                                        # Categorize failure pattern
+                                        pattern = categorize_error(error_msg)
+                                        if pattern:
+                                            failure_patterns.setdefault(pattern, []).append({
+                                                'command': cmd['command'][:100],
+                                                'error': error_msg
+                                            })
 
-            except json.JSONDecodeError:
-                continue
+                    # Extract tool calls (bash commands and skill invocations)
+                    elif isinstance(content, list):
+                        for block in content:
+                            if not isinstance(block, dict):
+                                continue
+                            get = block.get
+                            if get('type') != 'tool_use':
+                                continue
+                            tool_name = get('name', '')
+
+                            # Track Bash commands
+                            if tool_name == 'Bash':
+                                command = get('input', {}).get('command', '')
+                                if command:
+                                    tool_id = get('id', '')
+                                    cmd = {
+                                        'index': i,
+                                        'tool_id': tool_id,
+                                        'command': command[:150]  # Reduced from 300
+                                    }
+                                    add_command(cmd)
+                                    commands_by_id.setdefault(tool_id, cmd)
+
+                            # Track Skill invocations
+                            elif tool_name == 'Skill':
+                                skill_name = get('input', {}).get('skill', '')
+                                if skill_name:
+                                    add_skill({
+                                        'skill': skill_name,
+                                        'timestamp': obj.get('timestamp', '')
+                                    })
+
+                except ValueError:
+                    continue
     except Exception as e:
         result['error'] = str(e)
 
     # Generate smarter summary
     if result['user_messages']:
-        # Filter out trivial and system messages
-        meaningful = [
-            m['content'] for m in result['user_messages']
-            if m['content'].strip().lower() not in TRIVIAL_MESSAGES
-            and not m['content'].startswith('/')  # Skip slash commands
-            and len(m['content'].strip()) > 10    # Skip very short messages
-        ]
+        # Filter out trivial and system messages, cheapest checks first
+        meaningful = []
+        for m in result['user_messages']:
+            content = m['content']
+            stripped = content.strip()
+            if len(stripped) <= 10:    # Skip very short messages
+                continue
+            if content[:1] == '/':     # Skip slash commands
+                continue
+            if stripped.lower() in TRIVIAL_MESSAGES:
+                continue
+            meaningful.append(content)
 
         if meaningful:
             # Use first substantial message as primary summary
@@ -206,28 +283,21 @@ def parse_session_full(session_file: Path) -> dict:
             first_msgs = [m['content'] for m in result['user_messages'][:3]]
             result['summary'] = ' | '.join(m[:100] for m in first_msgs)
 
-    # Convert topics set to list for JSON serialization
-    result['topics'] = list(result['topics'])[:20]
+    # Convert topics to list for JSON serialization
+    result['topics'] = list(result['topics'])
 
     return result
 
+def looks_like_error(output: str) -> bool:
+    """Check tool output for error indicators (lowercases it once)."""
+    output_lower = output.lower()
+    return any(err in output_lower for err in ERROR_INDICATORS)
+
 def categorize_error(error_msg: str) -> str:
     """Categorize error into a pattern type."""
     error_lower = error_msg.lower()
 
-    patterns = [
-        ('permission_denied', ['permission denied', 'access denied', 'eacces']),
-        ('not_found', ['not found', 'no such file', 'enoent', 'command not found']),
-        ('syntax_error', ['syntax error', 'parse error', 'unexpected token']),
-        ('connection_error', ['connection refused', 'timeout', 'econnrefused', 'network']),
-        ('import_error', ['import error', 'module not found', 'no module named']),
-        ('type_error', ['typeerror', 'type error']),
-        ('git_error', ['fatal:', 'git']),
-        ('npm_error', ['npm err', 'npm warn']),
-        ('python_error', ['traceback', 'exception']),
-    ]
-
-    for pattern_name, keywords in patterns:
+    for pattern_name, keywords in ERROR_CATEGORIES:
         if any(kw in error_lower for kw in keywords):
             return pattern_name
 
@@ -235,12 +305,12 @@ def categorize_error(error_msg: str) -> str:
 
 def load_index(project_folder: str) -> dict:
     """Load existing index or create new one."""
-    index_file = Path.home() / '.claude' / 'projects' / project_folder / 'recall-index.json'
+    index_file = get_project_dir(project_folder) / 'recall-index.json'
 
     if index_file.exists():
         try:
-            with open(index_file, 'r') as f:
-                return json.load(f)
+            with open(index_file, 'rb') as f:
+                return json_loads(f.read())
         except:
             pass
 
@@ -265,8 +335,7 @@ def save_session_details(project_folder: str, session_id: str, details: dict):
     details_dir.mkdir(parents=True, exist_ok=True)
 
     details_file = details_dir / f"{session_id}.json"
-    with open(details_file, 'w') as f:
-        json.dump(details, f, indent=2, default=str)
+    atomic_write(details_file, json_dumps(details))
 
 
 def load_session_details(project_folder: str, session_id: str) -> dict:
@@ -274,8 +343,8 @@ def load_session_details(project_folder: str, session_id: str) -> dict:
     details_file = get_session_details_dir(project_folder) / f"{session_id}.json"
     if details_file.exists():
         try:
-            with open(details_file, 'r') as f:
-                return json.load(f)
+            with open(details_file, 'rb') as f:
+                return json_loads(f.read())
         except:
             pass
     return None
@@ -295,6 +364,7 @@ def create_session_summary(session_data: dict) -> dict:
 
     return {
         'date': session_data['date'],
+        'file_size': session_data.get('file_size'),  # With date, detects unchanged sessions
         'summary': summary_text[:200],  # Keep summary short
         'message_count': len(session_data.get('user_messages', [])),
         'command_count': len(session_data.get('commands', [])),
@@ -314,29 +384,29 @@ def prune_index(index: dict, max_sessions: int = MAX_SESSIONS_IN_INDEX, max_inde
     if not sessions:
         return index
 
-    # Sort sessions by date, newest first
-    sorted_sessions = sorted(
-        sessions.items(),
-        key=lambda x: x[1].get('date', ''),
-        reverse=True
-    )
-
-    # First pass: enforce max sessions limit
-    if len(sorted_sessions) > max_sessions:
-        keep_sessions = dict(sorted_sessions[:max_sessions])
-        index['sessions'] = keep_sessions
-        sorted_sessions = list(keep_sessions.items())
-
-    # Second pass: check size and prune further if needed
+    def session_date(item):
+        return item[1].get('date', '')
+
+    # First pass: enforce max sessions limit, keeping the newest by date
+    if len(sessions) > max_sessions:
+        index['sessions'] = dict(heapq.nlargest(max_sessions, sessions.items(), key=session_date))
+
+    # Second pass: check size and prune further if needed. Serialize once,
+    # then subtract each removed entry's share instead of re-dumping.
     index_size = len(json.dumps(index, default=str))
     target_size = max_index_size_kb * 1024
+    if index_size <= target_size:
+        return index
+
+    # Sort sessions by date, newest first
+    sorted_sessions = sorted(index['sessions'].items(), key=session_date, reverse=True)
 
     while index_size > target_size and len(sorted_sessions) > 10:
         # Remove oldest session from index (detail file preserved)
-        oldest_id = sorted_sessions[-1][0]
+        oldest_id, oldest = sorted_sessions.pop()
         del index['sessions'][oldest_id]
-        sorted_sessions = sorted_sessions[:-1]
-        index_size = len(json.dumps(index, default=str))
+        # '"<id>": <summary>' plus its ', ' separator
+        index_size -= len(json.dumps(oldest_id)) + len(json.dumps(oldest, default=str)) + 4
 
     return index
 
@@ -350,61 +420,64 @@ def cleanup_old_detail_files(project_folder: str, keep_count: int = 100):
     if not details_dir.exists():
         return
 
-    detail_files = sorted(details_dir.glob('*.json'), key=lambda f: f.stat().st_mtime, reverse=True)
+    detail_files = list(details_dir.glob('*.json'))
+    if len(detail_files) <= keep_count:
+        return
 
-    # Remove files beyond keep_count
-    for f in detail_files[keep_count:]:
+    # Remove files beyond the keep_count most recent
+    keep = set(heapq.nlargest(keep_count, detail_files, key=lambda f: f.stat().st_mtime))
+    for f in detail_files:
+        if f in keep:
+            continue
         try:
             f.unlink()
         except:
             pass
 
 
-def cleanup_old_jsonl_files(project_folder: str):
+def cleanup_old_jsonl_files(project_folder: str, jsonl_files: list = None):
     """Remove old raw .jsonl files to reclaim disk space.
 
     - Session .jsonl files older than 30 days are removed
     - Agent/subagent .jsonl files older than 7 days are removed
     - The most recent 5 session files are always kept regardless of age
     """
-    claude_dir = Path.home() / '.claude' / 'projects' / project_folder
-    if not claude_dir.exists():
+    if jsonl_files is None:
+        jsonl_files = scan_jsonl_files(get_project_dir(project_folder))
+    if not jsonl_files:
         return
 
+    # Compare raw mtimes against epoch cutoffs; no datetime per file
     now = datetime.now()
-    session_max_age = timedelta(days=30)
-    agent_max_age = timedelta(days=7)
+    session_cutoff = (now - timedelta(days=30)).timestamp()
+    agent_cutoff = (now - timedelta(days=7)).timestamp()
     freed = 0
 
     # Separate session and agent files
     session_files = []
     agent_files = []
 
-    for f in claude_dir.glob('*.jsonl'):
-        if f.name.startswith('agent-'):
+    for f in jsonl_files:
+        if f[3]:
             agent_files.append(f)
         else:
             session_files.append(f)
 
     # Sort session files by mtime, keep most recent 5
-    session_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-    for f in session_files[5:]:  # Skip 5 most recent
+    session_files.sort(key=lambda x: x[1], reverse=True)
+    for path, mtime, size, _ in session_files[5:]:  # Skip 5 most recent
         try:
-            age = now - datetime.fromtimestamp(f.stat().st_mtime)
-            if age > session_max_age:
-                size = f.stat().st_size
-                f.unlink()
+            if mtime < session_cutoff:
+                path.unlink()
                 freed += size
         except:
             pass
 
     # Clean old agent files (more aggressive - 7 days)
-    for f in agent_files:
+    for path, mtime, size, _ in agent_files:
         try:
-            age = now - datetime.fromtimestamp(f.stat().st_mtime)
-            if age > agent_max_age:
-                size = f.stat().st_size
-                f.unlink()
+            if mtime < agent_cutoff:
+                path.unlink()
                 freed += size
         except:
             pass
@@ -415,15 +488,15 @@ def cleanup_old_jsonl_files(project_folder: str):
 
 def save_index(project_folder: str, index: dict):
     """Save index to disk, pruning if necessary."""
-    index_dir = Path.home() / '.claude' / 'projects' / project_folder
+    index_dir = get_project_dir(project_folder)
     index_dir.mkdir(parents=True, exist_ok=True)
 
     # Prune before saving to keep size manageable
     index = prune_index(index)
 
     index_file = index_dir / 'recall-index.json'
-    with open(index_file, 'w') as f:
-        json.dump(index, f, indent=2, default=str)
+    # Compact: the index is rewritten every session and read by tools, not people
+    atomic_write(index_file, json_dumps(index, indent=False))
 
 def main():
     # Get project path from environment or argument
@@ -432,14 +505,25 @@ def main():
         cwd = sys.argv[1]
 
     project_folder = get_project_folder(cwd)
-    session_file = find_current_session(project_folder)
+    jsonl_files = scan_jsonl_files(get_project_dir(project_folder))
+    session_file = find_current_session(project_folder, jsonl_files)
 
     if not session_file:
         print(f"No session found for project: {cwd}", file=sys.stderr)
         sys.exit(0)
 
+    # Skip the parse entirely if the session file hasn't changed since it
+    # was last indexed (date is the file mtime)
+    index = load_index(project_folder)
+    st = session_file.stat()
+    previous = index['sessions'].get(session_file.stem)
+    if (previous and previous.get('file_size') == st.st_size
+            and previous.get('date') == datetime.fromtimestamp(st.st_mtime).isoformat()):
+        print(f"Session {session_file.stem[:8]}... already indexed (unchanged)")
+        return
+
     # Parse session (full data)
-    session_data = parse_session_full(session_file)
+    session_data = parse_session_full(session_file, st)
     session_id = session_data['session_id']
 
     # === TIERED STORAGE ===
@@ -458,8 +542,8 @@ def main():
     save_session_details(project_folder, session_id, full_details)
 
     # 2. Store only lightweight summary in main index
-    index = load_index(project_folder)
-    index['sessions'][session_id] = create_session_summary(session_data)
+    summary = create_session_summary(session_data)
+    index['sessions'][session_id] = summary
 
     # Ensure usage section exists (for older indices)
     if 'usage' not in index:
@@ -488,7 +572,8 @@ def main():
             index['failure_patterns'][pattern] = []
 
         existing = index['failure_patterns'][pattern]
-        existing_cmds = {f.get('command', '')[:50] for f in existing[-5:]}
+        # Latest recent entry per command prefix (later entries win)
+        recent = {f.get('command', '')[:50]: f for f in existing[-5:]}
 
         for f in failures:
             f['session_id'] = session_id
@@ -496,30 +581,31 @@ def main():
             cmd_prefix = f.get('command', '')[:50]
 
             # Deduplicate: if same command prefix in recent entries, increment count instead
-            if cmd_prefix in existing_cmds:
-                for entry in reversed(existing):
-                    if entry.get('command', '')[:50] == cmd_prefix:
-                        entry['count'] = entry.get('count', 1) + 1
-                        entry['date'] = session_data['date']  # Update to latest
-                        break
+            entry = recent.get(cmd_prefix)
+            if entry is not None:
+                entry['count'] = entry.get('count', 1) + 1
+                entry['date'] = session_data['date']  # Update to latest
             else:
                 f['count'] = 1
                 existing.append(f)
-                existing_cmds.add(cmd_prefix)
+                recent[cmd_prefix] = f
 
         # Keep only last 15 of each pattern in index
         index['failure_patterns'][pattern] = existing[-15:]
 
+    # Count runs in the index so periodic cleanup needs no randomness
+    runs_since_cleanup = index['usage'].get('runs_since_cleanup', 0) + 1
+    run_cleanup = runs_since_cleanup >= CLEANUP_INTERVAL
+    index['usage']['runs_since_cleanup'] = 0 if run_cleanup else runs_since_cleanup
+
     # Save updated index
     save_index(project_folder, index)
 
     # === KNOWLEDGE EXTRACTION (v2) ===
     try:
-        # Prepare session data for extraction
+        # Prepare session data for extraction (only the fields it reads)
         extraction_data = {
             'session_id': session_id,
-            'summary': session_data['summary'],
-            'user_messages': session_data['user_messages'],
             'commands': session_data['commands'],
             'failures': session_data['failures']
         }
@@ -528,27 +614,28 @@ def main():
         extract_script = Path(__file__).parent / 'extract-knowledge.py'
         if extract_script.exists():
             import subprocess
-            result = subprocess.run(
-                ['python3', str(extract_script), '-', project_folder],
-                input=json.dumps(extraction_data),
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if result.returncode == 0:
-                extract_result = json.loads(result.stdout)
-                proposals = extract_result.get('proposals_added', 0)
-                if proposals > 0:
-                    print(f"  Proposed {proposals} learnings (run /recall learn to review)")
+            # Fire and forget so the hook doesn't wait on extraction; new
+            # proposals show up as pending learnings at the next SessionStart.
+            # Errors go to a log in the project dir instead of the hook output.
+            extract_log = get_project_dir(project_folder) / 'recall-extract.log'
+            with open(extract_log, 'ab') as log:
+                proc = subprocess.Popen(
+                    ['python3', str(extract_script), '-', project_folder],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    stderr=log,
+                    start_new_session=True
+                )
+            with proc.stdin:
+                proc.stdin.write(json.dumps(extraction_data).encode('utf-8'))
     except Exception as e:
         # Don't fail indexing if extraction fails
         pass
 
-    # Periodic cleanup (every ~10 sessions)
-    import random
-    if random.random() < 0.1:
+    # Periodic cleanup (every CLEANUP_INTERVAL sessions)
+    if run_cleanup:
         cleanup_old_detail_files(project_folder)
-        cleanup_old_jsonl_files(project_folder)
+        cleanup_old_jsonl_files(project_folder, jsonl_files)
 
     skills_msg = f", {len(session_data['skills_used'])} skills" if session_data['skills_used'] else ""
     print(f"Indexed session {session_id[:8]}... ({len(session_data['user_messages'])} messages, {len(session_data['commands'])} commands, {len(session_data['failures'])} failures{skills_msg})")
@@ -9,9 +9,7 @@ Usage:
   recall-learn.py --reject <index>   - Reject specific learning
 """
 
-import json
 import sys
-import os
 from pathlib import Path
 
 # Add lib to path
@@ -119,7 +117,6 @@ def reject_one(project_folder: str, index_str: str):
 
 
 def main():
-    cwd = os.environ.get('CLAUDE_PROJECT_DIR') or os.getcwd()
     project_folder = get_project_folder()
 
     args = sys.argv[1:]
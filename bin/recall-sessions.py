@@ -23,13 +23,81 @@ import os
 import json
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
+import heapq
+from itertools import islice
 import re
+import mmap
+
+# Add lib to path
+LIB_DIR = Path(__file__).resolve().parent.parent / "lib"
+sys.path.insert(0, str(LIB_DIR))
+
+from storage import json_loads, json_dumps, atomic_write, scan_jsonl_files
+
+# Markers of secrets that shouldn't stay in the index (lowercase; matched case-insensitively)
+SENSITIVE_PATTERNS = ('begin openssh', 'begin rsa', 'api_key=', 'secret=', 'token=', 'password', 'private key')
+
+# The only non-ASCII characters whose lowercase contains an ASCII letter
+# (so str.lower() matching finds them for that letter)
+ASCII_LOWER_SOURCES = {'i': '\u0130', 'k': '\u212a'}
+
+# Leading 'YYYY-MM-DDTHH:MM' of an ISO timestamp
+ISO_MINUTE_RE = re.compile(r'\d{4}-\d\d-\d\dT\d\d:\d\d', re.ASCII)
 
 def get_project_folder(cwd: str) -> str:
     """Convert working directory to Claude's project folder naming convention."""
     return cwd.replace('/', '-')
 
 
+def contains_sensitive(text: str) -> bool:
+    """Check whether text contains any sensitive marker (case-insensitive)."""
+    text_lower = text.lower()
+    return any(p in text_lower for p in SENSITIVE_PATTERNS)
+
+
+def message_content(msg) -> str:
+    """Text of a stored user message (dict entries, or plain strings in older files)."""
+    return msg.get('content', '') if isinstance(msg, dict) else str(msg)
+
+
+@lru_cache(maxsize=16)
+def raw_term_pattern(term: str):
+    """Compile a bytes pattern that finds every place `term` could occur in raw JSONL.
+
+    Mirrors the case-insensitive `term.lower() in content.lower()` test, including
+    the characters a JSON encoder may store raw (UTF-8) or \\u-escaped. Returns None
+    for terms that may themselves be stored escaped (quotes, backslashes,
+    non-printable or non-ASCII), which have to be matched after parsing.
+    """
+    if not term or not all(' ' <= c <= '~' and c not in '"\\' for c in term):
+        return None
+    parts = []
+    for c in term.lower():
+        part = re.escape(c.encode())
+        source = ASCII_LOWER_SOURCES.get(c)
+        if source:
+            part = b'(?:%s|%s|%s)' % (part, re.escape(source.encode()),
+                                     re.escape(f'\\u{ord(source):04x}'.encode()))
+        parts.append(part)
+    return re.compile(b''.join(parts), re.IGNORECASE)
+
+
+def file_may_contain(session_file: Path, term: str) -> bool:
+    """Cheap pre-check: False only if no string in the file can contain `term`."""
+    pattern = raw_term_pattern(term)
+    if pattern is None:
+        return True
+    try:
+        with open(session_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return pattern.search(mm) is not None
+    except (OSError, ValueError):
+        return True
+
+
 def get_session_details_dir(project_folder: str) -> Path:
     """Get the directory for storing session detail files."""
     return Path.home() / '.claude' / 'projects' / project_folder / 'recall-sessions'
@@ -43,8 +111,8 @@ def load_session_details(project_folder: str, session_id: str) -> dict:
     details_file = get_session_details_dir(project_folder) / f"{session_id}.json"
     if details_file.exists():
         try:
-            with open(details_file, 'r') as f:
-                return json.load(f)
+            with open(details_file, 'rb') as f:
+                return json_loads(f.read())
         except:
             pass
     return None
@@ -53,15 +121,16 @@ def load_session_details(project_folder: str, session_id: str) -> dict:
 def list_all_project_indices() -> list:
     """List all project folders with recall indices."""
     projects_dir = Path.home() / '.claude' / 'projects'
-    if not projects_dir.exists():
-        return []
 
+    # is_dir() uses the entry's d_type; only directories cost a stat
     projects = []
-    for proj_dir in projects_dir.iterdir():
-        if proj_dir.is_dir():
-            index_file = proj_dir / 'recall-index.json'
-            if index_file.exists():
-                projects.append(proj_dir.name)
+    try:
+        with os.scandir(projects_dir) as entries:
+            for entry in entries:
+                if entry.is_dir() and os.path.exists(os.path.join(entry.path, 'recall-index.json')):
+                    projects.append(entry.name)
+    except OSError:
+        return []
     return projects
 
 
@@ -70,8 +139,8 @@ def load_index(project_folder: str) -> dict:
     index_file = Path.home() / '.claude' / 'projects' / project_folder / 'recall-index.json'
     if index_file.exists():
         try:
-            with open(index_file, 'r') as f:
-                return json.load(f)
+            with open(index_file, 'rb') as f:
+                return json_loads(f.read())
         except:
             pass
     return None
@@ -79,8 +148,8 @@ def load_index(project_folder: str) -> dict:
 def save_index(project_folder: str, index: dict):
     """Save index back to disk."""
     index_file = Path.home() / '.claude' / 'projects' / project_folder / 'recall-index.json'
-    with open(index_file, 'w') as f:
-        json.dump(index, f, indent=2, default=str)
+    # Temp file + rename so readers never see a partial index
+    atomic_write(index_file, json_dumps(index, indent=False))
 
 def get_index_path(project_folder: str) -> Path:
     """Get the path to the recall index file."""
@@ -201,21 +270,40 @@ def reset_index(index: dict, project_folder: str):
     print("Use `/recall import <file>` to restore from backup.")
 
 def find_session_files(project_folder: str) -> list:
-    """Find all session files for a project, sorted by modification time."""
+    """Find all session files for a project as (path, mtime) pairs, newest first."""
     claude_dir = Path.home() / '.claude' / 'projects' / project_folder
-    if not claude_dir.exists():
-        return []
-
-    sessions = []
-    for f in claude_dir.glob('*.jsonl'):
-        if not f.name.startswith('agent-'):
-            sessions.append(f)
 
-    sessions.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+    # One scandir pass; mtimes come from the directory entries
+    sessions = [(path, mtime) for path, mtime, _, is_agent in scan_jsonl_files(claude_dir)
+                if not is_agent]
+    sessions.sort(key=lambda x: x[1], reverse=True)
     return sessions
 
-def parse_session(session_file: Path, search_term: str = None) -> dict:
-    """Parse a session file and extract key information (fallback when no index)."""
+def iter_user_messages(session_file: Path):
+    """Yield the text of each typed user message in a session file, in order."""
+    with open(session_file, 'rb', buffering=1 << 20) as f:
+        for line in f:
+            # Most records are assistant/tool output; skip decoding them
+            if b'"user"' not in line:
+                continue
+            try:
+                obj = json_loads(line)
+            except ValueError:
+                continue
+            if obj.get('type') == 'user':
+                msg = obj.get('message', {})
+                if isinstance(msg, dict):
+                    content = msg.get('content', '')
+                    if isinstance(content, str) and content and not content.startswith('<'):
+                        yield content
+
+def parse_session(session_file: Path, search_term: str = None, max_messages: int = None) -> dict:
+    """Parse a session file and extract key information (fallback when no index).
+
+    Without a search term, stops reading after `max_messages` user messages. With
+    one, files whose raw bytes cannot contain the term are not parsed at all (their
+    `user_messages` stay empty).
+    """
     result = {
         'file': session_file.name,
         'session_id': session_file.stem,
@@ -223,31 +311,44 @@ def parse_session(session_file: Path, search_term: str = None) -> dict:
         'user_messages': [],
         'matches': []
     }
+    term_lower = search_term.lower() if search_term else None
+    if search_term and not file_may_contain(session_file, search_term):
+        return result
 
     try:
-        with open(session_file, 'r') as f:
-            for line in f:
-                try:
-                    obj = json.loads(line)
-                    if obj.get('type') == 'user':
-                        msg = obj.get('message', {})
-                        if isinstance(msg, dict):
-                            content = msg.get('content', '')
-                            if isinstance(content, str) and content:
-                                if not content.startswith('<'):
-                                    result['user_messages'].append(content[:500])
-                                    if search_term and search_term.lower() in content.lower():
-                                        result['matches'].append(content[:300])
-                except json.JSONDecodeError:
-                    continue
+        for content in iter_user_messages(session_file):
+            result['user_messages'].append(content[:500])
+            if term_lower and term_lower in content.lower():
+                result['matches'].append(content[:300])
+            # Listing only needs the first few messages
+            if not search_term and max_messages and len(result['user_messages']) >= max_messages:
+                break
     except Exception as e:
         result['error'] = str(e)
 
     return result
 
+def peek_first_user_message(session_file: Path, max_messages: int = 5) -> str:
+    """Return the first substantial (> 20 chars) of a session's first few user messages.
+
+    Stops reading as soon as one is found; returns None if there is none.
+    """
+    try:
+        for content in islice(iter_user_messages(session_file), max_messages):
+            msg = content[:500]
+            if len(msg) > 20:
+                return msg
+    except Exception:
+        pass
+    return None
+
 def format_date(date_input) -> str:
     """Format date consistently."""
     if isinstance(date_input, str):
+        # Stored dates are isoformat() output; slice out the wall-clock digits
+        # (a UTC offset is dropped, not applied, by the parsing path too)
+        if ISO_MINUTE_RE.match(date_input):
+            return date_input[:10] + ' ' + date_input[11:16]
         try:
             dt = datetime.fromisoformat(date_input.replace('Z', '+00:00'))
             if dt.tzinfo:
@@ -440,25 +541,22 @@ def cleanup_noise_sessions(index: dict, project_folder: str):
 def cleanup_sensitive_sessions(index: dict, project_folder: str):
     """Remove sessions containing sensitive data from index and detail files."""
     sessions_data = index.get('sessions', {})
-    sensitive_patterns = ['BEGIN OPENSSH', 'BEGIN RSA', 'API_KEY=', 'SECRET=', 'TOKEN=', 'password', 'PRIVATE KEY']
     removed = []
 
     for sid in list(sessions_data.keys()):
         session = sessions_data[sid]
-        summary = session.get('summary', '')
 
         # Check summary text
-        is_sensitive = any(p.lower() in summary.lower() for p in sensitive_patterns)
+        is_sensitive = contains_sensitive(session.get('summary', ''))
 
         # Also check detail file
         if not is_sensitive:
             details = load_session_details(project_folder, sid)
             if details:
-                for msg in details.get('user_messages', []):
-                    content = msg.get('content', '') if isinstance(msg, dict) else str(msg)
-                    if any(p.lower() in content.lower() for p in sensitive_patterns):
-                        is_sensitive = True
-                        break
+                is_sensitive = any(
+                    contains_sensitive(message_content(msg))
+                    for msg in details.get('user_messages', [])
+                )
 
         if is_sensitive:
             removed.append(sid)
@@ -483,41 +581,38 @@ def cleanup_jsonl_files(project_folder: str):
         print("No project directory found")
         return
 
+    # Compare raw mtimes against epoch cutoffs; no datetime per file
     now = datetime.now()
-    session_max_age = timedelta(days=30)
-    agent_max_age = timedelta(days=7)
+    session_cutoff = (now - timedelta(days=30)).timestamp()
+    agent_cutoff = (now - timedelta(days=7)).timestamp()
     freed = 0
     removed_count = 0
 
     session_files = []
     agent_files = []
 
-    for f in claude_dir.glob('*.jsonl'):
-        if f.name.startswith('agent-'):
+    for f in scan_jsonl_files(claude_dir):
+        if f[3]:
             agent_files.append(f)
         else:
             session_files.append(f)
 
     # Keep 5 most recent session files, remove old ones
-    session_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-    for f in session_files[5:]:
+    session_files.sort(key=lambda x: x[1], reverse=True)
+    for path, mtime, size, _ in session_files[5:]:
         try:
-            age = now - datetime.fromtimestamp(f.stat().st_mtime)
-            if age > session_max_age:
-                size = f.stat().st_size
-                f.unlink()
+            if mtime < session_cutoff:
+                path.unlink()
                 freed += size
                 removed_count += 1
         except:
             pass
 
     # Remove agent files older than 7 days
-    for f in agent_files:
+    for path, mtime, size, _ in agent_files:
         try:
-            age = now - datetime.fromtimestamp(f.stat().st_mtime)
-            if age > agent_max_age:
-                size = f.stat().st_size
-                f.unlink()
+            if mtime < agent_cutoff:
+                path.unlink()
                 freed += size
                 removed_count += 1
         except:
@@ -537,21 +632,20 @@ def cleanup_dedup_failures(index: dict, project_folder: str):
 
     for pattern in list(failure_patterns.keys()):
         entries = failure_patterns[pattern]
-        seen = {}
-        unique = []
+        seen = {}  # command prefix -> first entry; insertion order is list order
 
         for entry in entries:
             cmd_key = entry.get('command', '')[:50]
-            if cmd_key in seen:
+            prev = seen.get(cmd_key)
+            if prev is None:
+                seen[cmd_key] = entry
+            else:
                 # Merge into existing
-                seen[cmd_key]['count'] = seen[cmd_key].get('count', 1) + entry.get('count', 1)
-                seen[cmd_key]['date'] = max(seen[cmd_key].get('date', ''), entry.get('date', ''))
+                prev['count'] = prev.get('count', 1) + entry.get('count', 1)
+                prev['date'] = max(prev.get('date', ''), entry.get('date', ''))
                 deduped += 1
-            else:
-                seen[cmd_key] = entry
-                unique.append(entry)
 
-        failure_patterns[pattern] = unique[-15:]  # Keep last 15
+        failure_patterns[pattern] = list(seen.values())[-15:]  # Keep last 15
 
     if deduped > 0:
         save_index(project_folder, index)
@@ -607,43 +701,34 @@ def show_cleanup_analysis(index: dict, sessions: list, project_folder: str, acti
 
     # Analyze sessions
     sessions_data = index.get('sessions', {})
-    noise_sessions = []
-    sensitive_sessions = []
-    useful_sessions = []
-
-    sensitive_patterns = ['BEGIN OPENSSH', 'BEGIN RSA', 'API_KEY=', 'SECRET=', 'TOKEN=', 'password', 'PRIVATE KEY']
+    noise_sessions = []      # session ids
+    sensitive_sessions = []  # session ids
 
     for sid, session in sessions_data.items():
-        msg_count = session.get('message_count', 0)
-        summary = session.get('summary', '')
-
         # Check for sensitive data in summary
-        has_sensitive = any(p.lower() in summary.lower() for p in sensitive_patterns)
-
-        if has_sensitive:
-            sensitive_sessions.append((sid, session))
-        elif msg_count < 3 and session.get('failure_count', 0) == 0:
-            noise_sessions.append((sid, session))
-        else:
-            useful_sessions.append((sid, session))
+        if contains_sensitive(session.get('summary', '')):
+            sensitive_sessions.append(sid)
+        elif session.get('message_count', 0) < 3 and session.get('failure_count', 0) == 0:
+            noise_sessions.append(sid)
+    useful_count = len(sessions_data) - len(sensitive_sessions) - len(noise_sessions)
 
     # Report
     print(f"### Sessions: {len(sessions_data)} total")
-    print(f"  - Useful: {len(useful_sessions)}")
+    print(f"  - Useful: {useful_count}")
     print(f"  - Low-value (< 3 msgs, no failures): {len(noise_sessions)}")
     print(f"  - Contains sensitive data: {len(sensitive_sessions)}")
     print()
 
     if sensitive_sessions:
         print("### Sessions with sensitive data:")
-        for sid, session in sensitive_sessions:
-            print(f"  - `{sid[:8]}...` ({format_date(session.get('date', ''))})")
+        for sid in sensitive_sessions:
+            print(f"  - `{sid[:8]}...` ({format_date(sessions_data[sid].get('date', ''))})")
         print()
 
     if noise_sessions:
         print("### Low-value sessions:")
-        for sid, session in noise_sessions[:5]:
-            summary = session.get('summary', 'No summary')[:60]
+        for sid in noise_sessions[:5]:
+            summary = sessions_data[sid].get('summary', 'No summary')[:60]
             print(f"  - `{sid[:8]}...`: {summary}")
         if len(noise_sessions) > 5:
             print(f"  ... and {len(noise_sessions) - 5} more")
@@ -683,10 +768,9 @@ def show_cleanup_analysis(index: dict, sessions: list, project_folder: str, acti
     agent_count = 0
     agent_size = 0
 
-    for f in claude_dir.glob('*.jsonl'):
-        size = f.stat().st_size
+    for _, _, size, is_agent in scan_jsonl_files(claude_dir):
         total_size += size
-        if f.name.startswith('agent-'):
+        if is_agent:
             agent_count += 1
             agent_size += size
         else:
@@ -713,10 +797,11 @@ def show_last_session(index: dict, sessions: list, project_folder: str):
     """
     # Try index first to identify the previous session
     if index and index.get('sessions'):
-        sorted_sessions = sorted(
+        # Only the two newest are needed
+        sorted_sessions = heapq.nlargest(
+            2,
             index['sessions'].items(),
-            key=lambda x: x[1].get('date', ''),
-            reverse=True
+            key=lambda x: x[1].get('date', '')
         )
 
         # Skip current (first), show previous
@@ -736,7 +821,7 @@ def show_last_session(index: dict, sessions: list, project_folder: str):
             if details:
                 print("### User Messages:")
                 for i, msg in enumerate(details.get('user_messages', [])[:15], 1):
-                    content = msg.get('content', '') if isinstance(msg, dict) else str(msg)
+                    content = message_content(msg)
                     clean_msg = content.replace('\n', ' ').strip()[:200]
                     if clean_msg:
                         print(f"{i}. {clean_msg}")
@@ -760,12 +845,14 @@ def show_last_session(index: dict, sessions: list, project_folder: str):
             return
 
     # Fallback to JSONL parsing
+    if sessions is None:
+        sessions = find_session_files(project_folder)
     if len(sessions) < 2:
         print("No previous session found (only current session exists)")
         return
 
-    session = sessions[1]
-    data = parse_session(session)
+    session = sessions[1][0]
+    data = parse_session(session, max_messages=15)
 
     print("## Previous Session")
     print(f"**Date:** {format_date(data['date'])}")
@@ -790,22 +877,27 @@ def search_sessions(search_term: str, index: dict, sessions: list, project_folde
 
     # Search sessions - try detail files first, fall back to index
     if index and index.get('sessions'):
-        sorted_sessions = sorted(
+        # Search last 20 sessions
+        recent_sessions = heapq.nlargest(
+            20,
             index['sessions'].items(),
-            key=lambda x: x[1].get('date', ''),
-            reverse=True
+            key=lambda x: x[1].get('date', '')
         )
 
-        for session_id, session_summary in sorted_sessions[:20]:  # Search last 20 sessions
+        details_dir = get_session_details_dir(project_folder)
+        for session_id, session_summary in recent_sessions:
             matches = []
 
-            # Try to load full details
-            details = load_session_details(project_folder, session_id)
+            # Only decode detail files whose raw bytes may contain the term; on a
+            # miss (or an empty file) the index summary is searched as before
+            details = None
+            if file_may_contain(details_dir / f"{session_id}.json", search_term):
+                details = load_session_details(project_folder, session_id)
 
             if details:
                 # Search in user messages
                 for msg in details.get('user_messages', []):
-                    content = msg.get('content', '') if isinstance(msg, dict) else str(msg)
+                    content = message_content(msg)
                     if search_lower in content.lower():
                         matches.append(f"msg: {content}")
 
@@ -817,8 +909,10 @@ def search_sessions(search_term: str, index: dict, sessions: list, project_folde
 
                 # Search in failures
                 for fail in details.get('failures', []):
-                    if search_lower in fail.get('error', '').lower() or search_lower in fail.get('command', '').lower():
-                        matches.append(f"fail: `{fail.get('command', '')[:60]}` -> {fail.get('error', '')[:80]}")
+                    fail_cmd = fail.get('command', '')
+                    fail_error = fail.get('error', '')
+                    if search_lower in fail_error.lower() or search_lower in fail_cmd.lower():
+                        matches.append(f"fail: `{fail_cmd[:60]}` -> {fail_error[:80]}")
 
                 # Search in skills
                 for skill in details.get('skills_used', []):
@@ -842,17 +936,20 @@ def search_sessions(search_term: str, index: dict, sessions: list, project_folde
         # Also search failure patterns
         for pattern, failures in index.get('failure_patterns', {}).items():
             for f in failures:
-                if search_lower in f.get('command', '').lower() or search_lower in f.get('error', '').lower():
+                command = f.get('command', '')
+                if search_lower in command.lower() or search_lower in f.get('error', '').lower():
                     if not found:
                         print("### In Failure Patterns:")
                     found = True
-                    print(f"  > [{pattern}] `{f.get('command', '')[:60]}`")
+                    print(f"  > [{pattern}] `{command[:60]}`")
 
         if found:
             return
 
     # Fallback to JSONL search
-    for session in sessions[:10]:
+    if sessions is None:
+        sessions = find_session_files(project_folder)
+    for session, _ in sessions[:10]:
         data = parse_session(session, search_term)
         if data['matches']:
             found = True
@@ -921,13 +1018,13 @@ def list_sessions(index: dict, sessions: list, project_folder: str):
 
     # Use index if available
     if index and index.get('sessions'):
-        sorted_sessions = sorted(
+        recent_sessions = heapq.nlargest(
+            7,
             index['sessions'].items(),
-            key=lambda x: x[1].get('date', ''),
-            reverse=True
+            key=lambda x: x[1].get('date', '')
         )
 
-        for i, (session_id, session) in enumerate(sorted_sessions[:7]):
+        for i, (session_id, session) in enumerate(recent_sessions):
             current = " (current)" if i == 0 else ""
             date = format_date(session.get('date', ''))
             summary = session.get('summary', 'No summary')[:150]
@@ -939,17 +1036,17 @@ def list_sessions(index: dict, sessions: list, project_folder: str):
         return
 
     # Fallback to JSONL parsing
-    for i, session in enumerate(sessions[:7]):
-        data = parse_session(session)
-        messages = data['user_messages'][:5]
+    if sessions is None:
+        sessions = find_session_files(project_folder)
+    for i, (session, mtime) in enumerate(sessions[:7]):
+        date = datetime.fromtimestamp(mtime)
+        msg = peek_first_user_message(session)
         summary = "No user messages found"
-        for msg in messages:
-            if len(msg) > 20:
-                summary = msg[:150] + "..." if len(msg) > 150 else msg
-                break
+        if msg:
+            summary = msg[:150] + "..." if len(msg) > 150 else msg
 
         current = " (current)" if i == 0 else ""
-        print(f"**{format_date(data['date'])}**{current}")
+        print(f"**{format_date(date)}**{current}")
         print(f"  {summary}")
         print()
 
@@ -962,9 +1059,14 @@ def main():
     command = ' '.join(sys.argv[2:]) if len(sys.argv) > 2 else None
 
     project_folder = get_project_folder(cwd)
-    sessions = find_session_files(project_folder)
     index = load_index(project_folder)
 
+    # Session files are only needed for the JSONL fallbacks; with an index,
+    # the commands that use them list the directory on demand
+    sessions = None
+    if not index:
+        sessions = find_session_files(project_folder)
+
     if not sessions and not index:
         print(f"No sessions found for project: {cwd}")
         print(f"Looking in: ~/.claude/projects/{project_folder}")
@@ -20,7 +20,7 @@ def load_index(project_folder: str) -> dict:
 
     if index_file.exists():
         try:
-            with open(index_file, 'r') as f:
+            with open(index_file, 'rb') as f:
                 return json.load(f)
         except:
             pass
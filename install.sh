@@ -147,6 +147,7 @@ if [ "$INSTALL_RECALL" = true ]; then
     mkdir -p "$CLAUDE_DIR/lib"
     ln -sf "$SCRIPT_DIR/lib/knowledge.py" "$CLAUDE_DIR/lib/"
     ln -sf "$SCRIPT_DIR/lib/pending.py" "$CLAUDE_DIR/lib/"
+    ln -sf "$SCRIPT_DIR/lib/storage.py" "$CLAUDE_DIR/lib/"
     ln -sf "$SCRIPT_DIR/lib/__init__.py" "$CLAUDE_DIR/lib/" 2>/dev/null || touch "$CLAUDE_DIR/lib/__init__.py"
 
     # New v2 scripts
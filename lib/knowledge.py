@@ -9,6 +9,8 @@ import os
 from pathlib import Path
 from typing import Optional
 
+from storage import json_dumps, atomic_write
+
 
 GLOBAL_CLAUDE_MD = Path.home() / ".claude" / "CLAUDE.md"
 
@@ -41,7 +43,7 @@ def load_index(project_folder: str = None) -> dict:
     index_file = get_index_path(project_folder)
     if index_file.exists():
         try:
-            with open(index_file, 'r') as f:
+            with open(index_file, 'rb') as f:
                 return json.load(f)
         except (json.JSONDecodeError, IOError):
             pass
@@ -62,8 +64,8 @@ def save_index(index: dict, project_folder: str = None):
         project_folder = get_project_folder()
     index_file = get_index_path(project_folder)
     index_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(index_file, 'w') as f:
-        json.dump(index, f, indent=2, default=str)
+    # Temp file + rename so readers never see a partial index
+    atomic_write(index_file, json_dumps(index, indent=False))
 
 
 def get_learnings(project_folder: str = None) -> list:
@@ -95,6 +97,31 @@ def add_pending_learning(learning: dict, project_folder: str = None):
     return False
 
 
+def add_pending_learnings(learnings: list, project_folder: str = None) -> int:
+    """Add several learnings to the pending queue with one index write.
+
+    Returns the number added; titles already pending or approved are skipped.
+    """
+    index = load_index(project_folder)
+    if 'pending_learnings' not in index:
+        index['pending_learnings'] = []
+
+    known_titles = {l.get('title', '') for l in index['pending_learnings']}
+    known_titles.update(l.get('title', '') for l in index.get('learnings', []))
+
+    added = 0
+    for learning in learnings:
+        title = learning.get('title')
+        if title not in known_titles:
+            index['pending_learnings'].append(learning)
+            known_titles.add(title)
+            added += 1
+
+    if added:
+        save_index(index, project_folder)
+    return added
+
+
 def approve_learning(index: int, project_folder: str = None) -> Optional[dict]:
     """Move a pending learning to approved. Returns the learning or None."""
     idx = load_index(project_folder)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+File storage helpers for the recall system.
+JSON encoding (orjson when installed), atomic file replacement and session
+file listing shared by the scripts that read and write project data.
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+def stdlib_json_dumps(obj, indent: bool = True) -> bytes:
+    """Serialize to JSON bytes with the json module, indented or compact."""
+    if indent:
+        return json.dumps(obj, indent=2, default=str).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), default=str).encode('utf-8')
+
+
+# Session JSONL is the hot path; use orjson when installed (both take bytes)
+try:
+    import orjson
+
+    def json_loads(data):
+        """Decode JSON, retrying with json for input orjson rejects.
+
+        orjson refuses lone-surrogate escapes (\\udXXX) that json accepts.
+        """
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data)
+
+    def json_dumps(obj, indent: bool = True) -> bytes:
+        """Serialize to JSON bytes, indented or compact."""
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0, default=str)
+        except TypeError:
+            # orjson refuses lone surrogates (e.g. output cut mid-emoji), which
+            # json escapes as \udXXX
+            return stdlib_json_dumps(obj, indent)
+except ImportError:
+    json_loads = json.loads
+    json_dumps = stdlib_json_dumps
+
+
+def atomic_write(path: Path, data: bytes):
+    """Write data to a temp file and rename it over path.
+
+    Readers (and a hook killed mid-write) never see a truncated file. The
+    temp file is removed if the write fails.
+    """
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def scan_jsonl_files(project_dir: Path) -> list:
+    """List a project directory's raw .jsonl files in one directory pass.
+
+    Returns (path, mtime, size, is_agent) tuples; stat data comes from
+    the scandir entry so callers can share it instead of re-statting.
+    A missing directory yields an empty list.
+    """
+    files = []
+    try:
+        with os.scandir(project_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.endswith('.jsonl'):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files.append((Path(entry.path), st.st_mtime, st.st_size, name.startswith('agent-')))
+    except OSError:
+        pass
+    return files